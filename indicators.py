@@ -4,27 +4,40 @@
 """
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
 import typing as t
 
+import numpy as np
 
-def sma(values: list[float], period: int) -> list[float]:
-    """简单移动平均 (SMA)。返回与输入等长的列表，前期不足的用 None 填充。"""
-    out: list[float] = []
-    window: list[float] = []
-    for v in values:
-        window.append(v)
-        if len(window) > period:
-            window.pop(0)
-        if len(window) < period:
-            out.append(None)
-        else:
-            out.append(sum(window) / period)
-    return out
+try:
+    from indicators_numba import _ema_kernel  # Numba 编译的 EMA 递推内核
+except Exception:
+    _ema_kernel = None
+
+# 序列长度超过该值时才走 Numba 内核；短序列收益被调用开销抵消
+_NUMBA_MIN_LEN = 64
+
+
+def sma(values: list[float] | np.ndarray, period: int) -> np.ndarray:
+    """简单移动平均 (SMA)。返回与输入等长的 float64 数组，前期不足的用 NaN 填充。
+
+    实现采用 NumPy 累计和（cumsum）差分：
+    window_sum[i] = cumsum[i] - cumsum[i-period]，整段计算在 C 层完成，
+    避免逐元素维护 Python 滑动窗口（O(N·period)）。
+    """
+    if period <= 0:
+        raise ValueError("period must be > 0")
+    n = len(values)
+    if n < period:
+        return np.full(n, np.nan)
+    c = np.cumsum(np.asarray(values, dtype=np.float64))
+    means = (c[period - 1:] - np.concatenate(([0.0], c[:-period]))) / period
+    return np.concatenate((np.full(period - 1, np.nan), means))
 
 
-def ema(values: list[float], period: int) -> list[float]:
-    """指数移动平均 (EMA)。返回与输入等长的列表，前期不足的用 None 填充。
+def ema(values: list[float] | np.ndarray, period: int) -> np.ndarray:
+    """指数移动平均 (EMA)。返回与输入等长的 float64 数组，前期不足的用 NaN 填充。
 
     与主流交易所（含 Binance）一致：
     - 使用前 `period` 根的 SMA 作为 EMA 初始值；
@@ -32,63 +45,82 @@ def ema(values: list[float], period: int) -> list[float]:
     """
     if period <= 0:
         raise ValueError("period must be > 0")
-    out: list[float] = []
+    n = len(values)
+    if n < period:
+        return np.full(n, np.nan)
+    arr = np.ascontiguousarray(values, dtype=np.float64)
+    if _ema_kernel is not None and n > _NUMBA_MIN_LEN:
+        return _ema_kernel(arr, period)
+    out = np.empty(n, dtype=np.float64)
+    out[: period - 1] = np.nan
+    # 以首个完整窗口的 SMA 作为初始 EMA
+    prev = float(arr[:period].mean())
+    out[period - 1] = prev
     k = 2 / (period + 1)
-    ema_prev: float | None = None
-    for i, v in enumerate(values):
-        if i < period - 1:
-            # 前期不足，填 None
-            out.append(None)
-            continue
-        if i == period - 1:
-            # 以首个完整窗口的 SMA 作为初始 EMA
-            window = values[:period]
-            ema_prev = sum(window) / period
-            out.append(ema_prev)
-            continue
-        # 正常迭代
-        ema_curr = v * k + (ema_prev if ema_prev is not None else v) * (1 - k)
-        ema_prev = ema_curr
-        out.append(ema_curr)
+    one_minus_k = 1 - k
+    # 递推本身是串行的；纯 Python 回退路径在内建 float 列表上迭代
+    # （逐元素索引 ndarray 会为每个元素装箱一个 np.float64），
+    # 结果先写入 Python 列表，最后一次性切片赋回输出数组。
+    tail = arr[period:].tolist()
+    for i, v in enumerate(tail):
+        prev = v * k + prev * one_minus_k
+        tail[i] = prev
+    out[period:] = tail
     return out
 
 
+def sma_update(prev_sum: float, new_val: float, dropped_val: float, period: int) -> tuple[float, float]:
+    """O(1) 滑动窗口均值更新。
+
+    用 new_val 替换窗口中的 dropped_val 后，返回 (新均值, 新窗口和)，
+    供实时路径在不重算整段历史的情况下刷新最后一个 MA 值。
+    """
+    new_sum = prev_sum + new_val - dropped_val
+    return new_sum / period, new_sum
+
+
+def ema_update(prev_ema: float, new_val: float, k: float) -> float:
+    """O(1) EMA 递推一步：EMA_t = v·k + EMA_{t-1}·(1-k)。"""
+    return new_val * k + prev_ema * (1 - k)
+
+
 @dataclass
 class CrossSignal:
     golden_cross: bool
     death_cross: bool
 
 
-def crossover(ema_list: list[float], ma_list: list[float]) -> CrossSignal:
-    """判断金叉/死叉。仅在最近两个点均有效时判断。
+def crossover(ema_list: np.ndarray, ma_list: np.ndarray) -> CrossSignal:
+    """判断金叉/死叉。仅在最近两个点均有效（非 NaN）时判断。
 
     - 金叉：前一根 EMA <= MA 且当前 EMA > MA
     - 死叉：前一根 EMA >= MA 且当前 EMA < MA
     """
-    if not ema_list or not ma_list:
-        return CrossSignal(False, False)
     if len(ema_list) < 2 or len(ma_list) < 2:
         return CrossSignal(False, False)
 
     prev_ema, curr_ema = ema_list[-2], ema_list[-1]
     prev_ma, curr_ma = ma_list[-2], ma_list[-1]
-    if prev_ema is None or curr_ema is None or prev_ma is None or curr_ma is None:
+    # 暖机期的 NaN 直接短路
+    if math.isnan(prev_ema) or math.isnan(curr_ema) or math.isnan(prev_ma) or math.isnan(curr_ma):
         return CrossSignal(False, False)
 
-    golden = prev_ema <= prev_ma and curr_ema > curr_ma
-    death = prev_ema >= prev_ma and curr_ema < curr_ma
+    # bool() 去掉 np.bool_ 包装，保持字段为内建 bool
+    golden = bool(prev_ema <= prev_ma and curr_ema > curr_ma)
+    death = bool(prev_ema >= prev_ma and curr_ema < curr_ma)
     return CrossSignal(golden_cross=golden, death_cross=death)
 
 
-def is_rising(series: list[float], lookback: int = 3) -> bool:
+def is_rising(series: list[float] | np.ndarray, lookback: int = 3) -> bool:
     """判断指标是否呈上升趋势：最近 lookback 根单调非降。"""
-    vals = [v for v in series[-lookback:] if v is not None]
-    if len(vals) < lookback:
+    tail = np.asarray(series[-lookback:], dtype=np.float64)
+    if tail.size < lookback or np.isnan(tail).any():
         return False
-    return all(vals[i] <= vals[i + 1] for i in range(len(vals) - 1))
+    # 单次 np.diff + 向量化比较，替代逐对 Python 比较
+    return bool((np.diff(tail) >= 0).all())
 
 
-def ema_slope(series: list[float], lookback: int, mode: str = "mean_diff", normalize_by_ema: bool = True) -> float | None:
+def ema_slope(series: list[float] | np.ndarray, lookback: int, mode: str = "mean_diff", normalize_by_ema: bool = True) -> float | None:
     """计算 EMA 的斜率强度。
 
     参数：
@@ -102,33 +134,30 @@ def ema_slope(series: list[float], lookback: int, mode: str = "mean_diff", norma
     """
     if lookback is None or lookback < 2:
         return None
-    vals = [v for v in series[-lookback:] if v is not None]
-    if len(vals) < lookback:
+    tail = np.asarray(series[-lookback:], dtype=np.float64)
+    if tail.size < lookback or np.isnan(tail).any():
         return None
-    curr = vals[-1]
+    curr = float(tail[-1])
 
     if mode == "linreg":
-        # 线性回归拟合：x=0..N-1, y=EMA
-        n = len(vals)
-        xs = list(range(n))
-        mean_x = sum(xs) / n
-        mean_y = sum(vals) / n
-        var_x = sum((x - mean_x) ** 2 for x in xs)
-        if var_x == 0:
-            return None
-        cov_xy = sum((xs[i] - mean_x) * (vals[i] - mean_y) for i in range(n))
-        slope = cov_xy / var_x
+        # 线性回归拟合：x=0..N-1, y=EMA。
+        # 闭式解：var_x = n(n²-1)/12 为常数；cov_xy = Σ(i·y_i) - (n-1)/2·Σy_i，
+        # 两个归约即可得出斜率，无需三次 Python 循环（lookback>=2 已保证 var_x>0）。
+        n = tail.size
+        sxy = float(np.arange(n) @ tail)
+        sy = float(tail.sum())
+        cov_xy = sxy - (n - 1) * 0.5 * sy
+        slope = cov_xy / (n * (n * n - 1) / 12.0)
     else:
         # 默认均值差分：更灵敏
-        diffs = [vals[i] - vals[i - 1] for i in range(1, len(vals))]
-        slope = sum(diffs) / len(diffs)
+        slope = float(np.diff(tail).mean())
 
     if normalize_by_ema and curr and curr != 0:
         slope = slope / curr
     return slope
 
 
-def slope_ok(series: list[float], lookback: int, min_slope: float, *, mode: str = "mean_diff", normalize_by_ema: bool = True, strict_monotonic: bool = False) -> tuple[bool, bool]:
+def slope_ok(series: list[float] | np.ndarray, lookback: int, min_slope: float, *, mode: str = "mean_diff", normalize_by_ema: bool = True, strict_monotonic: bool = False) -> tuple[bool, bool]:
     """返回 (long_ok, short_ok) 斜率门槛是否满足。
 
     - long_ok: slope >= min_slope 且（如 strict_monotonic）最近 N 根严格递增。
@@ -140,11 +169,13 @@ def slope_ok(series: list[float], lookback: int, min_slope: float, *, mode: str
     long_ok = s >= float(min_slope)
     short_ok = s <= -float(min_slope)
     if strict_monotonic:
-        vals = [v for v in series[-lookback:] if v is not None]
-        if len(vals) < lookback:
+        tail = np.asarray(series[-lookback:], dtype=np.float64)
+        if tail.size < lookback or np.isnan(tail).any():
             return (False, False)
-        inc_ok = all(vals[i] < vals[i + 1] for i in range(len(vals) - 1))
-        dec_ok = all(vals[i] > vals[i + 1] for i in range(len(vals) - 1))
+        # 差分一次，严格递增/递减两个方向复用
+        d = np.diff(tail)
+        inc_ok = bool((d > 0).all())
+        dec_ok = bool((d < 0).all())
         long_ok = long_ok and inc_ok
         short_ok = short_ok and dec_ok
     return (long_ok, short_ok)
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""Numba 加速内核（可选依赖）
+
+EMA 递推是串行标量循环，NumPy 无法整体向量化，正适合用 Numba 编译为
+本地机器码。本模块仅在安装了 numba 时可导入；indicators.py 会按需
+尝试导入并自动回退到纯 Python 实现。
+
+注：这里给出 eager 签名 float64[:](float64[:], int64)，在导入时即完成
+编译，避免首次调用的 JIT 延迟落在实时路径上。
+"""
+from __future__ import annotations
+
+import numpy as np
+from numba import njit
+
+
+@njit("float64[:](float64[:], int64)", cache=True, fastmath=True)
+def _ema_kernel(arr: np.ndarray, period: int) -> np.ndarray:
+    n = arr.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    for i in range(period - 1):
+        out[i] = np.nan
+    prev = 0.0
+    for i in range(period):
+        prev += arr[i]
+    prev /= period
+    out[period - 1] = prev
+    k = 2.0 / (period + 1)
+    one_minus_k = 1.0 - k
+    for i in range(period, n):
+        prev = arr[i] * k + prev * one_minus_k
+        out[i] = prev
+    return out
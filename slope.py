@@ -29,7 +29,9 @@
 说明：斜率已做归一化（默认 true），相对不同价格区间更稳定；若你交易的是波动更剧烈或更平缓的币对，可相应提高或降低 min_slope。
 """
 
-from typing import Dict, Any
+import types
+from functools import lru_cache
+from typing import Dict, Any, Mapping
 
 
 # 预设参数（按 周期 × EMA5 + MA{15,20,30,50} 组合）
@@ -137,24 +139,56 @@ PRESETS: Dict[str, Dict[str, Dict[str, Any]]] = {
 }
 
 
-def get_preset(interval: str, ma_period: int) -> Dict[str, Any]:
+# 导入时冻结预设：叶子与中间层统一替换为只读 MappingProxyType，
+# get_preset 返回的即共享视图，调用方无法误改全局配置，也无需防御性拷贝；
+# 内容完全相同的叶子在进程内只保留一份（按排序后的键值对去重）。
+_leaf_pool: Dict[tuple, Mapping[str, Any]] = {}
+
+
+def _freeze_leaf(leaf: Dict[str, Any]) -> Mapping[str, Any]:
+    key = tuple(sorted(leaf.items()))
+    frozen = _leaf_pool.get(key)
+    if frozen is None:
+        frozen = types.MappingProxyType(dict(leaf))
+        _leaf_pool[key] = frozen
+    return frozen
+
+
+PRESETS = types.MappingProxyType({
+    interval: types.MappingProxyType({key: _freeze_leaf(leaf) for key, leaf in by_ma.items()})
+    for interval, by_ma in PRESETS.items()
+})
+
+# 将嵌套 PRESETS 摊平为 {(interval, ma_period): preset}，
+# 使 get_preset 退化为一次字典查找（无 f-string 拼 key、无两级遍历）。
+_PRESETS_FLAT: Dict[tuple, Mapping[str, Any]] = {
+    (interval, int(key[len("EMA5MA"):])): preset
+    for interval, by_ma in PRESETS.items()
+    for key, preset in by_ma.items()
+}
+
+
+@lru_cache(maxsize=16)
+def get_preset(interval: str, ma_period: int) -> Mapping[str, Any]:
     """返回指定周期与 MA 周期的斜率预设（字典）。
 
     interval: "1m" / "5m" / "15m"
     ma_period: 15 / 20 / 30 / 50
+
+    结果按 (interval, ma_period) 做 lru_cache 记忆化，重复调用为 O(1)。
     """
-    key = f"EMA5MA{ma_period}"
     try:
-        return PRESETS[interval][key]
+        return _PRESETS_FLAT[(interval, int(ma_period))]
     except KeyError:
         raise KeyError(f"No preset for interval={interval}, ma={ma_period}.")
 
 
-def to_jsonc_block(d: Dict[str, Any]) -> str:
+def to_jsonc_block(d: Mapping[str, Any]) -> str:
     """将预设 dict 转为可直接粘贴到 config.jsonc 的 JSONC 片段（带缩进）。"""
     import json
     # 注意：JSONC 支持注释，但此函数生成的是纯 JSON 片段；注释请参考本文件说明。
-    return json.dumps(d, ensure_ascii=False, indent=2)
+    # MappingProxyType 无法直接序列化，这里转普通 dict 再输出。
+    return json.dumps(dict(d), ensure_ascii=False, indent=2)
 
 
 if __name__ == "__main__":
@@ -10,19 +10,33 @@
 """
 from __future__ import annotations
 
+import math
 import os
 import sqlite3
 import time
 from dataclasses import dataclass
 from typing import Optional
 
-from indicators import ema, sma, crossover, is_rising, slope_ok
+import numpy as np
+
+from indicators import ema, sma, ema_update, sma_update, crossover, is_rising, slope_ok
 try:
     from slope import get_preset  # 用于按周期与MA周期自动加载斜率推荐参数
 except Exception:
     get_preset = None
 
 
+# 内存中保留的最大K线根数。指标最多回看 ma_period（默认 15）根，
+# 1000 根已留足余量；超出部分裁掉，避免长时间运行后序列无限增长。
+MAX_BARS = 1000
+
+
+def _finite_or_none(x: float) -> float | None:
+    """NaN → None，用于对外（JSON）输出。"""
+    x = float(x)
+    return None if math.isnan(x) else x
+
+
 @dataclass
 class Position:
     side: Optional[str]  # "LONG" | "SHORT" | None
@@ -47,14 +61,24 @@ class TradingEngine:
 
         self.ema_period = int(icfg.get("ema_period", 5))
         self.ma_period = int(icfg.get("ma_period", 15))
+        # 增量更新状态：EMA 平滑系数与最近 ma_period 根收盘价之和。
+        # 实时（未收盘）tick 只原地修改最后一根收盘价，此时用
+        # indicators.ema_update / sma_update 以 O(1) 刷新尾部指标，
+        # 避免每个 tick 重算整段 200 根历史。
+        self._k_ema = 2 / (self.ema_period + 1)
+        self._ma_sum: float | None = None
 
         # 状态
         self.position = Position(side=None, entry_price=None, qty=None, open_fee=None)
         self.current_price: float | None = None
         self.timestamps: list[int] = []  # close_time
-        self.closes: list[float] = []
-        self.ema_list: list[float] = []
-        self.ma_list: list[float] = []
+        # 收盘价的规范存储：预分配 float64 数组 + 写指针。指标直接在
+        # 视图上计算，省去每次调用的 list → ndarray 转换/拷贝。
+        self._closes_buf = np.empty(MAX_BARS, dtype=np.float64)
+        self._n_bars = 0
+        # 指标序列：与 closes 等长的 float64 数组，暖机期为 NaN（见 indicators）
+        self.ema_list: np.ndarray = np.empty(0, dtype=np.float64)
+        self.ma_list: np.ndarray = np.empty(0, dtype=np.float64)
         self.latest_kline: dict | None = None  # 未收盘的实时K线（完整O/H/L/C/Vol）
         # 计算选项
         icfg = config.get("indicators", {})
@@ -83,6 +107,13 @@ class TradingEngine:
         self.slope_strict_monotonic: bool = bool(slope_cfg.get("strict_monotonic", False))
         # 平仓价格连续判定的回看根数（例如 2 或 3）
         self.close_price_lookback: int = int(icfg.get("close_price_lookback", 2))
+        # 交易序号：每写入一条 trades 记录自增，供外部（如 SSE 推送）
+        # 廉价判断“最近交易/汇总是否变化”，避免每个 tick 都查库。
+        self.trade_seq: int = 0
+        # recent_trades / recent_klines 的结果缓存（按 limit 分键，存不可变
+        # tuple 供调用方直接共享），在对应表的唯一写入点失效。
+        self._recent_trades_cache: dict[int, tuple] = {}
+        self._recent_klines_cache: dict[int, tuple] = {}
 
         # DB
         self.db_path = os.path.join("db", "trading.db")
@@ -175,6 +206,7 @@ class TradingEngine:
             ),
         )
         self._db.commit()
+        self._recent_klines_cache.clear()
 
     def _insert_trade(self, side: str, price: float, qty: float, fee: float, pnl: float):
         cur = self._db.cursor()
@@ -186,6 +218,8 @@ class TradingEngine:
             (int(time.time() * 1000), self.symbol, side, price, qty, fee, pnl, self.balance),
         )
         self._db.commit()
+        self.trade_seq += 1
+        self._recent_trades_cache.clear()
 
     def _insert_wallet(self):
         cur = self._db.cursor()
@@ -233,15 +267,48 @@ class TradingEngine:
         }
 
     # --------------------- Data & Indicators ---------------------
+    @property
+    def closes(self) -> np.ndarray:
+        """收盘价序列视图（float64，长度 = 当前K线数）。"""
+        return self._closes_buf[: self._n_bars]
+
+    def _append_bar(self, close_time: int, price: float):
+        """追加一根K线；缓冲满（MAX_BARS）后整体左移一格（每根一次，摊销 O(1)）。"""
+        if self._n_bars == MAX_BARS:
+            self._closes_buf[:-1] = self._closes_buf[1:]
+            self._closes_buf[-1] = price
+            del self.timestamps[0]
+        else:
+            self._closes_buf[self._n_bars] = price
+            self._n_bars += 1
+        self.timestamps.append(close_time)
+
     def _recalc_indicators(self):
         self.ema_list = ema(self.closes, self.ema_period)
         self.ma_list = sma(self.closes, self.ma_period)
+        # 刷新滑动窗口和，供 _update_last_indicator 增量使用
+        if self._n_bars >= self.ma_period:
+            self._ma_sum = float(self.closes[-self.ma_period:].sum())
+        else:
+            self._ma_sum = None
+
+    def _update_last_indicator(self, old_price: float, price: float):
+        """最后一根K线收盘价被原地替换后，O(1) 更新尾部 EMA/MA。
+
+        依赖上一根（不再变化）的 EMA 与维护中的窗口和；处于暖机期、
+        状态不足以增量计算时回退到全量重算。
+        """
+        ema_prev = float(self.ema_list[-2]) if self.ema_list.size >= 2 else math.nan
+        if math.isnan(ema_prev) or self._ma_sum is None:
+            self._recalc_indicators()
+            return
+        self.ema_list[-1] = ema_update(ema_prev, price, self._k_ema)
+        self.ma_list[-1], self._ma_sum = sma_update(self._ma_sum, price, old_price, self.ma_period)
 
     def ingest_historical(self, klines: list[dict]):
         for k in klines:
             self._insert_kline(k)
-            self.timestamps.append(k["close_time"])
-            self.closes.append(float(k["close"]))
+            self._append_bar(int(k["close_time"]), float(k["close"]))
         self._recalc_indicators()
 
     def on_realtime_kline(self, k: dict):
@@ -256,19 +323,22 @@ class TradingEngine:
             if bool(k.get("is_final", False)):
                 # 新K线或当前K线收盘
                 if not self.timestamps or close_time != self.timestamps[-1]:
-                    self.timestamps.append(close_time)
-                    self.closes.append(price)
+                    self._append_bar(close_time, price)
+                    self._recalc_indicators()
                 else:
+                    old = self.closes[-1]
                     self.closes[-1] = price
-                self._recalc_indicators()
+                    self._update_last_indicator(old, price)
         else:
-            # 未收盘也进入计算：更灵敏，但与交易所图略有差异
+            # 未收盘也进入计算：更灵敏，但与交易所图略有差异。
+            # 新K线出现时全量重算（每根一次）；同一根K线内的 tick 走 O(1) 增量路径。
             if not self.timestamps or close_time != self.timestamps[-1]:
-                self.timestamps.append(close_time)
-                self.closes.append(price)
+                self._append_bar(close_time, price)
+                self._recalc_indicators()
             else:
+                old = self.closes[-1]
                 self.closes[-1] = price
-            self._recalc_indicators()
+                self._update_last_indicator(old, price)
 
 
         # 保存未收盘完整K线用于前端展示
@@ -299,9 +369,11 @@ class TradingEngine:
             normalize_by_ema=self.slope_normalize_by_ema,
             strict_monotonic=self.slope_strict_monotonic,
         )
-        ema_curr = self.ema_list[-1]
-        ma_curr = self.ma_list[-1]
-        if ema_curr is None or ma_curr is None:
+        if self.ema_list.size == 0 or self.ma_list.size == 0:
+            return
+        ema_curr = float(self.ema_list[-1])
+        ma_curr = float(self.ma_list[-1])
+        if math.isnan(ema_curr) or math.isnan(ma_curr):
             return
 
         # 轻量日志，便于观察实时更新
@@ -423,8 +495,9 @@ class TradingEngine:
             "fee_rate": self.fee_rate,
             "percent": self.percent,
             "current_price": self.current_price,
-            "ema": self.ema_list[-1] if self.ema_list else None,
-            "ma": self.ma_list[-1] if self.ma_list else None,
+            # NaN（暖机期）对外仍以 None 呈现，保持 JSON 合法且前端显示“-”
+            "ema": _finite_or_none(self.ema_list[-1]) if self.ema_list.size else None,
+            "ma": _finite_or_none(self.ma_list[-1]) if self.ma_list.size else None,
             # 动态提供均线周期，供前端展示（避免硬编码 5/15）
             "ema_period": self.ema_period,
             "ma_period": self.ma_period,
@@ -437,14 +510,20 @@ class TradingEngine:
             "latest_kline": latest_kline,
         }
 
-    def recent_trades(self, limit: int = 5) -> list[dict]:
-        cur = self._db.cursor()
-        cur.execute("SELECT * FROM trades ORDER BY id DESC LIMIT ?", (limit,))
-        rows = cur.fetchall()
-        return [dict(r) for r in rows]
-
-    def recent_klines(self, limit: int = 5) -> list[dict]:
-        cur = self._db.cursor()
-        cur.execute("SELECT * FROM klines ORDER BY id DESC LIMIT ?", (limit,))
-        rows = cur.fetchall()
-        return [dict(r) for r in rows]
\ No newline at end of file
+    def recent_trades(self, limit: int = 5) -> tuple[dict, ...]:
+        cached = self._recent_trades_cache.get(limit)
+        if cached is None:
+            cur = self._db.cursor()
+            cur.execute("SELECT * FROM trades ORDER BY id DESC LIMIT ?", (limit,))
+            cached = tuple(dict(r) for r in cur.fetchall())
+            self._recent_trades_cache[limit] = cached
+        return cached
+
+    def recent_klines(self, limit: int = 5) -> tuple[dict, ...]:
+        cached = self._recent_klines_cache.get(limit)
+        if cached is None:
+            cur = self._db.cursor()
+            cur.execute("SELECT * FROM klines ORDER BY id DESC LIMIT ?", (limit,))
+            cached = tuple(dict(r) for r in cur.fetchall())
+            self._recent_klines_cache[limit] = cached
+        return cached
\ No newline at end of file
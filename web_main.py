@@ -14,14 +14,67 @@ from pathlib import Path
 import re
 from typing import Any
 
-from flask import Flask, jsonify, Response
+from flask import Flask, Response
 import psutil
-import queue
 
 from binance_client import BinanceClient
 from binance_websocket import BinanceWebSocket
 from trading import TradingEngine
 
+# JSON 编码热路径：优先使用 orjson（C 实现，直接输出 bytes，约快 3–10 倍），
+# 未安装时回退到标准库 json。
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except Exception:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+class Broadcaster:
+    """SSE 发布/订阅：每个订阅者一个“最新值”槽位。
+
+    之前用单个共享 queue.Queue，多个浏览器标签会互相抢事件，慢客户端还会
+    把队列塞满反压生产者。这里改为“最新值覆盖”语义：publish 把同一份字节
+    写进每个订阅者的槽位并唤醒；订阅者只消费最新一帧，过期帧直接被覆盖
+    丢弃（页面只关心最新状态），生产者永不阻塞。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subs: list[tuple[threading.Event, list]] = []
+
+    def publish(self, payload: bytes) -> None:
+        with self._lock:
+            subs = list(self._subs)
+        for ev, slot in subs:
+            slot[0] = payload
+            ev.set()
+
+    def subscribe(self) -> tuple[threading.Event, list]:
+        sub = (threading.Event(), [None])
+        with self._lock:
+            self._subs.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: tuple[threading.Event, list]) -> None:
+        with self._lock:
+            try:
+                self._subs.remove(sub)
+            except ValueError:
+                pass
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subs)
+
+    def close(self) -> None:
+        """向所有订阅者发布 None 哨兵，通知其流正常结束。"""
+        self.publish(None)
+
 
 def load_config() -> dict:
     """加载配置，默认读取 config.jsonc，并兼容注释。
@@ -99,7 +152,7 @@ def start_ws(
     engine: TradingEngine,
     symbol: str,
     interval: str,
-    events_q: queue.Queue | None = None,
+    bus: Broadcaster | None = None,
     *,
     client: BinanceClient,
     enable_fallback_poller: bool = True,
@@ -109,35 +162,26 @@ def start_ws(
     - enable_fallback_poller: True 时，WS 不稳定会自动启用轮询；WS 恢复后关闭轮询
     """
 
-    poller_stop = {"fn": None}
+    poller_stop = {"stop": None}
 
     def start_poller_once():
-        if poller_stop["fn"] is None and enable_fallback_poller:
+        if poller_stop["stop"] is None and enable_fallback_poller:
             print("[Fallback] start price poller due to WS issue")
-            poller_stop["fn"] = start_price_poller(engine=engine, client=client, events_q=events_q)
+            poller_stop["stop"] = start_price_poller(engine=engine, client=client, bus=bus)
 
     def stop_poller_if_running():
-        if poller_stop["fn"] is not None:
-            try:
-                poller_stop["fn"]()
-            except Exception:
-                pass
-            poller_stop["fn"] = None
+        if poller_stop["stop"] is not None:
+            # start_price_poller 返回停止事件；置位后轮询循环立即退出
+            poller_stop["stop"].set()
+            poller_stop["stop"] = None
 
     def on_kline(k: dict):
         engine.on_realtime_kline(k)
-        # 推送最新状态到前端（与 Binance WS 同步节奏）
-        if events_q is not None:
+        # 推送最新状态到前端（与 Binance WS 同步节奏）；
+        # 无人订阅时直接跳过状态组装与编码，不占用 WS 读线程
+        if bus is not None and bus.subscriber_count > 0:
             try:
-                s = engine.status()
-                s["recent_trades"] = engine.recent_trades(5)
-                s["recent_klines"] = engine.recent_klines(5)
-                s["server_time"] = int(time.time() * 1000)
-                # 附带系统信息（CPU/MEM/DISK）
-                s["sysinfo"] = get_sysinfo()
-                # 汇总总盈亏/总手续费/总利润率
-                s["totals"] = engine.totals()
-                events_q.put_nowait(s)
+                bus.publish(build_status_event(engine))
             except Exception:
                 pass
 
@@ -165,17 +209,55 @@ def start_ws(
     return ws
 
 
-    def start_price_poller(engine: TradingEngine, client: BinanceClient, events_q: queue.Queue | None = None):
-      """轮询最新价格作为 WebSocket 的回退方案，保证页面与策略实时性。
+# 重字段缓存：recent_trades/recent_klines/totals 均走 SQLite 查询，
+# 但只在产生新交易或新收盘K线时才会变化；按 (trade_seq, 最新收盘时间)
+# 作指纹，指纹不变时直接复用上次的查询结果。
+_heavy_cache: dict[str, Any] = {"sig": None, "trades": [], "klines": [], "totals": {}}
+
 
-      每 2 秒获取一次价格，并更新引擎的当前价与未收盘K线价格。
-      """
+def build_status_event(engine: TradingEngine) -> bytes:
+    """组装完整状态并一次性编码为 SSE 帧（bytes）。
+
+    序列化在生产者侧只做一次；SSE 线程与后续订阅者复用同一份字节，
+    避免每个连接各自 json.dumps 相同的负载。
+    """
+    s = engine.status()
+    sig = (engine.trade_seq, engine.timestamps[-1] if engine.timestamps else 0)
+    if sig != _heavy_cache["sig"]:
+        _heavy_cache["trades"] = engine.recent_trades(5)
+        _heavy_cache["klines"] = engine.recent_klines(5)
+        _heavy_cache["totals"] = engine.totals()
+        _heavy_cache["sig"] = sig
+    s["recent_trades"] = _heavy_cache["trades"]
+    s["recent_klines"] = _heavy_cache["klines"]
+    s["totals"] = _heavy_cache["totals"]
+    s["server_time"] = int(time.time() * 1000)
+    # 附带系统信息（CPU/MEM/DISK）
+    s["sysinfo"] = get_sysinfo()
+    return b"data: " + _dumps(s) + b"\n\n"
+
+
+def start_price_poller(engine: TradingEngine, client: BinanceClient, bus: Broadcaster | None = None):
+    """轮询最新价格作为 WebSocket 的回退方案，保证页面与策略实时性。
+
+    基础节奏为每 2 秒一次：
+    - 用 stop_flag.wait 代替 sleep，WS 恢复后可立即停止轮询；
+    - 价格未变化时不重复组装/推送状态（至多每 10 秒推一次心跳帧）；
+    - REST 请求失败时按指数退避拉长间隔（上限 30 秒），成功后恢复。
+    """
     stop_flag = threading.Event()
+    base_interval = 2.0
+    max_interval = 30.0
+    heartbeat = 10.0
 
     def run():
+        interval = base_interval
+        last_price: float | None = None
+        last_push = 0.0
         while not stop_flag.is_set():
             try:
                 price = client.get_price(engine.symbol)
+                interval = base_interval
                 # 组装一个非最终的kline，close_time沿用最近一条，避免推进序列
                 close_time = engine.timestamps[-1] if engine.timestamps else int(time.time() * 1000)
                 k = {
@@ -191,29 +273,29 @@ def start_ws(
                     "volume": 0.0,
                 }
                 engine.on_realtime_kline(k)
-                # 推送状态，保证 WS 不稳定时仍能更新前端
-                if events_q is not None:
+                # 推送状态，保证 WS 不稳定时仍能更新前端；无人订阅时跳过，
+                # 价格未变且心跳未到期时也不重复推送
+                now = time.time()
+                if bus is not None and bus.subscriber_count > 0 and (
+                    last_price is None or price != last_price or (now - last_push) >= heartbeat
+                ):
                     try:
-                        s = engine.status()
-                        s["recent_trades"] = engine.recent_trades(5)
-                        s["recent_klines"] = engine.recent_klines(5)
-                        s["server_time"] = int(time.time() * 1000)
-                        s["sysinfo"] = get_sysinfo()
-                        # 修复：轮询事件也附带 totals，避免页面在“-”与数值之间来回切换
-                        s["totals"] = engine.totals()
-                        events_q.put_nowait(s)
+                        bus.publish(build_status_event(engine))
+                        last_price = price
+                        last_push = now
                     except Exception:
                         pass
             except Exception:
-                pass
-            time.sleep(2)
+                # REST 失败：指数退避，避免对故障端点持续打满请求
+                interval = min(interval * 2, max_interval)
+            stop_flag.wait(interval)
 
     th = threading.Thread(target=run, daemon=True)
     th.start()
     return stop_flag
 
 
-def create_app(engine: TradingEngine, port: int, tz_offset: int, events_q: queue.Queue, *, enable_poller: bool):
+def create_app(engine: TradingEngine, port: int, tz_offset: int, bus: Broadcaster, *, enable_poller: bool):
     app = Flask(__name__)
 
     @app.route("/status")
@@ -226,12 +308,12 @@ def create_app(engine: TradingEngine, port: int, tz_offset: int, events_q: queue
         s["config"] = get_config_summary(engine, tz_offset, enable_poller)
         # 修复：首次加载也返回 totals，避免首屏显示“-”随后切换为数值造成闪烁
         s["totals"] = engine.totals()
-        return jsonify(s)
+        return Response(_dumps(s), mimetype="application/json")
 
-    @app.route("/")
-    def index():
-        # 前端：使用 SSE 订阅 /events/status，随 WS 推送实时更新
-        html = """
+    # 前端：使用 SSE 订阅 /events/status，随 WS 推送实时更新。
+    # symbol/interval 在启动后不变，HTML 在建 app 时渲染并编码一次，
+    # 路由每次请求直接返回缓存好的字节，省去每次加载的两遍 str.replace。
+    html = """
         <!doctype html>
         <html lang=zh>
         <head>
@@ -381,18 +463,31 @@ def create_app(engine: TradingEngine, port: int, tz_offset: int, events_q: queue
         </body>
         </html>
         """
-        html = html.replace("__SYM__", engine.symbol).replace("__INTERVAL__", engine.interval)
-        return Response(html, mimetype="text/html")
+    index_bytes = html.replace("__SYM__", engine.symbol).replace("__INTERVAL__", engine.interval).encode("utf-8")
+
+    @app.route("/")
+    def index():
+        return Response(index_bytes, mimetype="text/html", headers={"Content-Length": str(len(index_bytes))})
 
     @app.route('/events/status')
     def events_status():
         def stream():
-            while True:
-                try:
-                    s = events_q.get()
-                    yield f"data: {json.dumps(s)}\n\n"
-                except Exception:
-                    time.sleep(0.1)
+            sub = bus.subscribe()
+            ev, slot = sub
+            try:
+                while True:
+                    # 阻塞等待新帧；客户端断开时 Flask 抛出 GeneratorExit，
+                    # 由 finally 完成退订，无需轮询或兜底 sleep
+                    ev.wait()
+                    ev.clear()
+                    payload = slot[0]
+                    if payload is None:
+                        # 关闭哨兵（Broadcaster.close），正常结束流
+                        return
+                    # 槽位中已是编码好的 SSE 帧（bytes），直接透传
+                    yield payload
+            finally:
+                bus.unsubscribe(sub)
         return Response(stream(), mimetype='text/event-stream')
 
     return app
@@ -414,26 +509,33 @@ def main():
     )
     engine.ingest_historical(hist)
 
-    # 事件队列供前端 SSE 使用
-    events_q: queue.Queue = queue.Queue(maxsize=1000)
+    # 状态广播器供前端 SSE 使用
+    bus = Broadcaster()
     enable_poller = bool(wcfg.get("enable_price_poller", False))
     # 启动 WS；当未开启价格轮询时，WS 出问题会自动启用轮询作回退
     ws = start_ws(
         engine,
         engine.symbol,
         engine.interval,
-        events_q=events_q,
+        bus=bus,
         client=client,
         enable_fallback_poller=not enable_poller,
     )
     if enable_poller:
-        start_price_poller(engine, client, events_q=events_q)
+        start_price_poller(engine, client, bus=bus)
 
-    app = create_app(engine, port=wcfg.get("port", 5001), tz_offset=wcfg.get("timezone_offset_hours", 8), events_q=events_q, enable_poller=enable_poller)
+    app = create_app(engine, port=wcfg.get("port", 5001), tz_offset=wcfg.get("timezone_offset_hours", 8), bus=bus, enable_poller=enable_poller)
     port = int(wcfg.get("port", 5001))
     print(f"Preview URL: http://localhost:{port}/")
-    # 生产建议使用 WSGI；此处使用 Flask 内建服务器即可
-    app.run(host="0.0.0.0", port=port, debug=False)
+    # 生产使用 waitress（多线程 WSGI）：每个 SSE 长连接占用一个工作线程，
+    # 多个浏览器可并发订阅；Flask 内建服务器是单线程的，一个 SSE 客户端
+    # 就会阻塞其它请求，仅在未安装 waitress 时作为调试回退。
+    try:
+        from waitress import serve
+    except ImportError:
+        app.run(host="0.0.0.0", port=port, debug=False)
+    else:
+        serve(app, host="0.0.0.0", port=port, threads=int(wcfg.get("server_threads", 16)))
 
 
 if __name__ == "__main__":